@@ -4,22 +4,21 @@ import sys
 import os
 
 # load PEP 582 libraryes
-_PATH = "/__pypackages__/3.9/lib"
-sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)) + _PATH)
+_PATH = f"/__pypackages__/{sys.version_info.major}.{sys.version_info.minor}/lib"
+# append, so the stdlib and every import before it skip scanning the
+# PEP 582 tree
+sys.path.append(os.path.dirname(os.path.abspath(__file__)) + _PATH)
 
 # load deps
-import getopt
-import yaml
-import json
-import uuid
-
 from src import logger
-from src.utils import CmdExecutor
 
 def validate_pipeline():
+    # heavy deps (PyYAML and co) are only imported when actually
+    # validating, so --help stays cheap
+    from src.utils import load_yaml
+
     logger.info("Attempting to validate pipeline")
-    with open('./pipeline.yaml', 'r') as read_yaml: 
-        pipeline_settings = yaml.load(read_yaml, Loader=yaml.FullLoader)
+    pipeline_settings = load_yaml('./pipeline.yaml')
     logger.info(f"test data {pipeline_settings['mock_variable']}")
     logger.info("Python pipeline validation succeed")
 
@@ -36,19 +35,21 @@ def print_help():
 
 # main 
 def main(argv):
-    try:
-        opts, args = getopt.getopt(argv, "hu:t:i:o:", ["validate", "help"])
-        
-    except getopt.GetoptError:
+    # the cli only knows --help and --validate, a direct dispatch
+    # avoids importing getopt on every invocation
+    if len(argv) != 1:
+        logger.error("Wrong options")
+        print_help()
+        sys.exit(2)
+    if argv[0] == '--help':
+        print_help()
+        sys.exit()
+    elif argv[0] == '--validate':
+        validate_pipeline()
+    else:
         logger.error("Wrong options")
         print_help()
         sys.exit(2)
-    for opt, arg in opts:
-        if opt == '--help':
-            print_help()
-            sys.exit()
-        elif opt == '--validate':
-            validate_pipeline()
 
 if __name__ == "__main__":
     main(sys.argv[1:])
@@ -3,4 +3,5 @@ from .cmd_executor import (
     CmdExecutorAnswer,
     CmdExecutorAnswerResultError,
     CmdExecutorParallelAnswer
-)
\ No newline at end of file
+)
+from .yaml_cache import load_yaml
@@ -1,9 +1,11 @@
 """Shell-command runner."""
 
-import select
+import logging
+import os
+import selectors
 import shlex
 import subprocess
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from typing import List, Union
 
 from src import logger
@@ -15,56 +17,77 @@ class _Command:
     Contains preformatted command in shell and exec formats .
     """
 
+    __slots__ = ("_cmd", "_shell", "_exec")
+
     def __init__(self, cmd: Union[str, List[str]]):
         self._cmd = cmd
+        # both formats are computed once: execf is accessed several
+        # times per run (logging, execution, exceptions) and
+        # shlex.split is not free
+        if isinstance(cmd, str):
+            self._shell = cmd
+            self._exec = shlex.split(cmd)
+        else:
+            # NOTE: не работает на python 3.6
+            # self._shell = shlex.join(cmd)
+            self._shell = " ".join(cmd)
+            self._exec = list(cmd)
 
     @property
-    def shellf(self) -> str:  # sourcery skip: assign-if-exp, reintroduce-else
+    def shellf(self) -> str:
         """Shell-format command .
 
         Returns:
             str: command
         """
-        if isinstance(self._cmd, list):
-            # NOTE: не работает на python 3.6
-            # return shlex.join(self._cmd)
-            return " ".join(self._cmd)
-        return self._cmd
+        return self._shell
 
     @property
-    def execf(
-        self,
-    ) -> List[str]:  # sourcery skip: assign-if-exp, reintroduce-else
+    def execf(self) -> List[str]:
         """Exec-format command .
 
         Returns:
             list[str]: command
         """
-        if isinstance(self._cmd, str):
-            return shlex.split(self._cmd)
-        return self._cmd
+        return self._exec
+
+
+# shared sentinel for hidden_command answers, no need to build a fresh
+# _Command per call
+_HIDDEN_COMMAND = _Command(["HIDDEN"])
 
 
 @dataclass
 class _CallAnswer:
+    __slots__ = ("returncode", "stdout")
+
     returncode: int
     stdout: str
 
 
 @dataclass
 class CmdExecutorAnswer:
-    """Dataclass contains runned command result."""
+    """Dataclass contains runned command result.
+
+    stdout/stderr are decoded from the raw pipes once, with
+    undecodable bytes replaced.
+    """
+
+    # no field defaults: they would clash with __slots__ on python <3.10
+    __slots__ = ("exit_code", "command", "stdout", "stderr")
 
     exit_code: int
     command: _Command
-    stdout: str = ""
-    stderr: str = ""
+    stdout: str
+    stderr: str
 
 
 @dataclass
 class CmdExecutorParallelAnswer:
     """Dataclass contains subprocess pid and result of it execution."""
 
+    __slots__ = ("pid", "result")
+
     pid: int
     result: CmdExecutorAnswer
 
@@ -123,40 +146,64 @@ class CmdExecutor:
         With this mode runned process will print output line by line in live mode, while it works.
 
         Args:
-            cmd (str): Command to run
+            cmd (_Command): Command to run
 
         Returns:
             _CallAnswer: Exit code and full output as variable 'out'
         """
-        proc = subprocess.Popen(
-            cmd,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
-            universal_newlines=True,
-            shell=True,
-            bufsize=1
-        )
-
-        out = ""
-
-        while proc.returncode is None:
-            ready_to_read, _, _ = select.select([proc.stdout], [], [], 0.1)
-            if ready_to_read:
-                out_line = proc.stdout.readline()
-                if out_line:
-                    out += out_line
-                    if call_log:
-                        logger.info(out_line.replace('\n', ''))
-
-            proc.poll()
-
-        remaining_output = proc.stdout.read()
-        if remaining_output:
-            out += remaining_output
+        # exec format with shell=False skips the intermediate
+        # '/bin/sh -c' fork+exec
+        try:
+            proc = subprocess.Popen(
+                cmd.execf,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                shell=False,
+                bufsize=0
+            )
+        except OSError as err:
+            # without a shell a missing executable raises instead of
+            # exiting 127, keep the shell-style answer
+            error_text = f"{cmd.shellf}: {err}"
             if call_log:
-                logger.info(remaining_output)
-
-        return _CallAnswer(returncode=proc.returncode, stdout=out)
+                logger.info(error_text)
+            return _CallAnswer(returncode=127, stdout=error_text)
+
+        os.set_blocking(proc.stdout.fileno(), False)
+        sel = selectors.DefaultSelector()
+        sel.register(proc.stdout, selectors.EVENT_READ)
+
+        # bytearray grows in place, bytes += would copy the whole
+        # buffer on every chunk
+        buf = bytearray()
+        # incomplete last line, kept until the next chunk arrives
+        tail = b""
+
+        # block in select until data or EOF, the pipe closes when the
+        # child exits, so no poll()/timeout cycle is needed and short
+        # commands do not pay the old 100ms quantum
+        eof = False
+        while not eof:
+            for key, _ in sel.select():
+                chunk = os.read(key.fd, 65536)
+                if not chunk:
+                    eof = True
+                    continue
+                buf.extend(chunk)
+                if call_log:
+                    out_lines = (tail + chunk).split(b'\n')
+                    tail = out_lines.pop()
+                    for out_line in out_lines:
+                        logger.info(out_line.decode('utf-8', 'replace'))
+        sel.close()
+
+        if call_log and tail:
+            logger.info(tail.decode('utf-8', 'replace'))
+
+        return _CallAnswer(
+            returncode=proc.wait(),
+            stdout=buf.decode('utf-8', 'replace'),
+        )
 
     @staticmethod
     def _prepare_check_result_answer(
@@ -173,12 +220,7 @@ class CmdExecutor:
             CmdExecutorAnswer: Result of command execution.
         """
         if hidden_command:
-            answer = CmdExecutorAnswer(
-                exit_code=answer.exit_code,
-                command=_Command(["HIDDEN"]),
-                stdout=answer.stdout,
-                stderr=answer.stdout,
-            )
+            answer = replace(answer, command=_HIDDEN_COMMAND)
         return answer
 
     @staticmethod
@@ -192,8 +234,8 @@ class CmdExecutor:
             CmdExecutorAnswer: Result of command execution.
         """
         logger.info("Call mode.")
-        result = CmdExecutor._call(cmd.shellf, call_log)
-        return CmdExecutorAnswer(result.returncode, cmd, result.stdout)
+        result = CmdExecutor._call(cmd, call_log)
+        return CmdExecutorAnswer(result.returncode, cmd, result.stdout, "")
 
     @staticmethod
     def _invoke_run(
@@ -209,15 +251,19 @@ class CmdExecutor:
             CmdExecutorAnswer: Result of command execution.
         """
         logger.info("Normal mode.")
+        # binary pipes with one decode at the end are cheaper than the
+        # TextIOWrapper machinery universal_newlines pulls in
         result = subprocess.run(
             cmd.execf,
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
-            input=stdin,
-            universal_newlines=True,
+            input=stdin.encode() if stdin is not None else None,
         )
         return CmdExecutorAnswer(
-            result.returncode, cmd, result.stdout, result.stderr
+            result.returncode,
+            cmd,
+            result.stdout.decode('utf-8', 'replace'),
+            result.stderr.decode('utf-8', 'replace'),
         )
 
     @staticmethod
@@ -230,8 +276,11 @@ class CmdExecutor:
         Raises:
             CmdExecutorAnwerResultError: if command was end with errorcode.
         """
-        logger.debug(f"answer: {answer.__dict__}")
-        logger.debug(f"answer.command: {answer.command.__dict__}")
+        # the answer repr can be MBs of stdout/stderr, do not build it
+        # unless debug logging is actually on
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("answer: %s", answer)
+            logger.debug("answer.command: %s", answer.command.execf)
 
         if answer.exit_code:
             raise CmdExecutorAnswerResultError(answer)
@@ -304,27 +353,63 @@ class CmdExecutor:
         for cmd in cmd_list:
             logger.info(f"Run parallell process with command: {cmd.execf}")
 
+        # close_fds=False lets subprocess use os.posix_spawn (vfork
+        # semantics) on python 3.8/3.9 instead of a full fork, which
+        # matters when launching many children from a large parent
         _proc_list = [
             subprocess.Popen(
-                cmd.execf, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+                cmd.execf,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                close_fds=False,
+                start_new_session=False,
             )
             for cmd in cmd_list
         ]
 
-        # Waits until all processes will done
+        # Drain stdout/stderr as data arrives and reap processes in
+        # completion order, so a slow first process cannot make the
+        # others fill their 64KB pipe buffers and deadlock.
+        sel = selectors.DefaultSelector()
+        _buffers = {}
+        _open_pipes = {}
         for _proc in _proc_list:
-            _proc.wait()
-            _stdout = _proc.stdout.read().decode("utf-8")
-            _stderr = _proc.stderr.read().decode("utf-8")
+            for _pipe in (_proc.stdout, _proc.stderr):
+                os.set_blocking(_pipe.fileno(), False)
+                _buffers[_pipe] = bytearray()
+                sel.register(_pipe, selectors.EVENT_READ, _proc)
+            _open_pipes[_proc] = 2
+
+        _pending = set(_proc_list)
+        while _pending:
+            if sel.get_map():
+                for key, _ in sel.select():
+                    chunk = os.read(key.fd, 65536)
+                    if chunk:
+                        _buffers[key.fileobj].extend(chunk)
+                    else:
+                        sel.unregister(key.fileobj)
+                        _open_pipes[key.data] -= 1
+            for _proc in list(_pending):
+                if _open_pipes[_proc] == 0:
+                    _proc.wait()
+                    _pending.remove(_proc)
+        sel.close()
+
+        # Results keep the order of cmd_list
+        for cmd, _proc in zip(cmd_list, _proc_list):
+            _stdout = _buffers[_proc.stdout].decode("utf-8", "replace")
+            _stderr = _buffers[_proc.stderr].decode("utf-8", "replace")
             proc_data = {
                 "pid": _proc.pid,
                 "result": CmdExecutorAnswer(
-                    _proc.returncode, _proc.args, _stdout, _stderr
+                    _proc.returncode, cmd, _stdout, _stderr
                 ),
             }
-            logger.debug(f"PID done: {_proc.pid}")
-            logger.debug(f"EXITCODE: {_proc.returncode}")
-            logger.debug(f"STDOUT: {_stdout}")
-            logger.debug(f"STDERR: {_stderr}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("PID done: %s", _proc.pid)
+                logger.debug("EXITCODE: %s", _proc.returncode)
+                logger.debug("STDOUT: %s", _stdout)
+                logger.debug("STDERR: %s", _stderr)
             results.append(CmdExecutorParallelAnswer(**proc_data))
         return results
@@ -0,0 +1,109 @@
+"""Cached YAML loader."""
+
+import json
+import os
+import pickle
+from collections import OrderedDict
+from typing import Any, Tuple
+
+# Keep at most this many parsed files in memory.
+_CACHE_MAX_SIZE = 100
+_cache: "OrderedDict[str, Tuple[float, int, Any]]" = OrderedDict()
+
+
+def _load_yaml_or_json_cache(path: str) -> Any:
+    """Parse a YAML file, preferring a fresh sidecar cache.
+
+    Both pickle and JSON load an order of magnitude faster than a YAML
+    parse, so the first parse dumps the result to '<path>.pkl' and
+    later calls load a sidecar as long as it is not older than the
+    YAML source. Pickle is preferred (objects are rebuilt directly in
+    C), older '<path>.json' sidecars are still honoured. The sidecars
+    live next to the source and are only trusted when their mtime gate
+    passes, - do not point this at directories writable by others.
+
+    Args:
+        path (str): Path to YAML file.
+
+    Returns:
+        Any: Parsed YAML content.
+    """
+    source_mtime = os.stat(path).st_mtime
+    pkl_path = path + '.pkl'
+    try:
+        if os.stat(pkl_path).st_mtime >= source_mtime:
+            with open(pkl_path, 'rb') as read_cache:
+                return pickle.load(read_cache)
+    except Exception:
+        # missing or broken sidecar, try the JSON one; garbage pickles
+        # can raise far more than UnpicklingError (EOFError on a
+        # truncated file, AttributeError/ImportError/IndexError...)
+        pass
+
+    cache_path = path + '.json'
+    try:
+        if os.stat(cache_path).st_mtime >= source_mtime:
+            with open(cache_path, 'r') as read_cache:
+                return json.load(read_cache)
+    except (OSError, ValueError):
+        # missing or broken sidecar, fall through to the YAML parse
+        pass
+
+    # PyYAML is only imported on a cache miss, the sidecar fast path
+    # above does not need it; libyaml C loader is much faster, but the
+    # extension is optional
+    import yaml
+    try:
+        from yaml import CSafeLoader as _Loader
+    except ImportError:
+        from yaml import FullLoader as _Loader
+
+    # one bulk binary read: the loader takes bytes and does its own
+    # UTF-8 handling, so the TextIOWrapper decode pass is skipped
+    with open(path, 'rb') as read_yaml:
+        data = yaml.load(read_yaml.read(), Loader=_Loader)
+
+    # write the sidecar atomically, so an interrupted run cannot leave
+    # a fresh-looking truncated pickle behind
+    tmp_path = pkl_path + '.tmp'
+    try:
+        with open(tmp_path, 'wb') as write_cache:
+            pickle.dump(data, write_cache, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, pkl_path)
+    except (OSError, pickle.PicklingError):
+        # read-only workdir or unpicklable content, skip the cache
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+    return data
+
+
+def load_yaml(path: str) -> Any:
+    """Load a YAML file, reusing a cached parse for unchanged files.
+
+    Entries are keyed on absolute path and validated against the file
+    mtime and size, so an unchanged file costs an os.stat plus a dict
+    lookup instead of a full parse. Returned objects are shared, -
+    callers must not mutate them.
+
+    Args:
+        path (str): Path to YAML file.
+
+    Returns:
+        Any: Parsed YAML content.
+    """
+    abs_path = os.path.abspath(path)
+    file_stat = os.stat(abs_path)
+    cached = _cache.get(abs_path)
+    if cached is not None and (file_stat.st_mtime, file_stat.st_size) == cached[:2]:
+        _cache.move_to_end(abs_path)
+        return cached[2]
+
+    data = _load_yaml_or_json_cache(abs_path)
+
+    _cache[abs_path] = (file_stat.st_mtime, file_stat.st_size, data)
+    _cache.move_to_end(abs_path)
+    if len(_cache) > _CACHE_MAX_SIZE:
+        _cache.popitem(last=False)
+    return data